@@ -8,26 +8,35 @@ creds = service_account.Credentials.from_service_account_file( "C:\\Users\\niran
 # Connect to Gmail API
 service = build("gmail", "v1", credentials=creds)
 
+# Maximum number of message ids accepted by a single batchModify call
+BATCH_MODIFY_LIMIT = 1000
+
 def mark_all_as_read():
     user_id = "me"
     query = "is:unread"
     
-    # Fetch unread messages
-    results = service.users().messages().list(userId=user_id, q=query).execute()
-    messages = results.get("messages", [])
+    # Fetch unread message ids page by page, requesting only the fields we read
+    messages = service.users().messages()
+    ids = []
+    request = messages.list(
+        userId=user_id, q=query, maxResults=500, fields="messages/id,nextPageToken"
+    )
+    while request is not None:
+        results = request.execute()
+        ids.extend(msg["id"] for msg in results.get("messages", []))
+        request = messages.list_next(request, results)
 
-    if not messages:
+    if not ids:
         print("No unread emails found.")
         return
 
-    # Mark emails as read
-    for msg in messages:
-        service.users().messages().modify(
-            userId=user_id, 
-            id=msg["id"], 
-            body={"removeLabelIds": ["UNREAD"]}
+    # Mark emails as read, up to 1000 ids per batchModify request
+    for start in range(0, len(ids), BATCH_MODIFY_LIMIT):
+        messages.batchModify(
+            userId=user_id,
+            body={"ids": ids[start:start + BATCH_MODIFY_LIMIT], "removeLabelIds": ["UNREAD"]}
         ).execute()
 
-    print(f"Marked {len(messages)} emails as read.")
+    print(f"Marked {len(ids)} emails as read.")
 
 mark_all_as_read()
\ No newline at end of file
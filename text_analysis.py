@@ -1,9 +1,14 @@
+import asyncio
+import functools
+import hashlib
+import importlib.util
 import os
 import re
+from collections import Counter
+import numpy as np
 import pandas as pd
-import requests
+import httpx
 from bs4 import BeautifulSoup
-from openpyxl import load_workbook
 
 # Define paths using os.path.join for cross-platform compatibility
 base_path = r"Path"
@@ -12,6 +17,12 @@ output_path = input_path
 stopwords_path = os.path.join(base_path, "StopWords")
 master_dict_path = os.path.join(base_path, "MasterDictionary")
 
+# HTTP fetch settings; concurrent fetches share one pooled client
+FETCH_CONNECTIONS = 64
+FETCH_TIMEOUT = 20
+# httpx needs the optional h2 package for HTTP/2; fall back to HTTP/1.1 without it
+HTTP2 = importlib.util.find_spec('h2') is not None
+
 # Word lists content
 POSITIVE_WORDS = """good
 great
@@ -183,6 +194,27 @@ where
 why
 how"""
 
+# Default word lists, built once at import for O(1) membership tests
+_DEFAULT_STOP = frozenset(STOPWORDS.split())
+_DEFAULT_POS = frozenset(POSITIVE_WORDS.split())
+_DEFAULT_NEG = frozenset(NEGATIVE_WORDS.split())
+
+# Active word lists used by calculate_scores; main() replaces them with the on-disk lists
+stop_words, positive_words, negative_words = _DEFAULT_STOP, _DEFAULT_POS, _DEFAULT_NEG
+
+# Precompiled patterns shared by the tokenizers and scoring helpers
+_WORD_RE = re.compile(r'[^\W_]+')
+_SENT_RE = re.compile(r'[.!?]+\s+(?=[A-Z])')
+_VOWEL_RE = re.compile(r'[aeiouy]')
+_PRONOUNS = ('i', 'we', 'my', 'ours', 'us')
+
+# Scores by text digest, so repeated articles are analyzed once; only successful results
+# are cached, and the oldest entries are evicted beyond SCORE_CACHE_SIZE
+SCORE_CACHE_SIZE = 4096
+_score_cache = {}
+# Word lists the cached scores were computed with
+_score_lexicons = (stop_words, positive_words, negative_words)
+
 def create_word_lists():
     """Create necessary directories and word list files if they don't exist"""
     # Create directories
@@ -207,14 +239,18 @@ def create_word_lists():
         with open(stop_file, 'w', encoding='utf-8') as f:
             f.write(STOPWORDS)
 
-def simple_word_tokenize(text):
-    """Simple word tokenizer that splits on whitespace and punctuation"""
-    return re.findall(r'\b\w+\b', text.lower())
-
-def simple_sentence_tokenize(text):
-    """Simple sentence tokenizer that splits on common sentence endings"""
-    sentences = re.split(r'[.!?]+\s+(?=[A-Z])', text)
-    return [s.strip() for s in sentences if s.strip()]
+def scan_text(text):
+    """Tokenize words and count sentences without building the sentence strings"""
+    # Lowercase before matching: case folding can expand characters (e.g. 'İ'), which changes token splits
+    counts = Counter(_WORD_RE.findall(text.lower()))
+    # Every boundary starts a non-empty sentence; only the text before the first one can be blank
+    boundaries = 0
+    first_start = len(text)
+    for match in _SENT_RE.finditer(text):
+        if not boundaries:
+            first_start = match.start()
+        boundaries += 1
+    return counts, boundaries + (1 if text[:first_start].strip() else 0)
 
 def load_stopwords(path):
     try:
@@ -224,10 +260,10 @@ def load_stopwords(path):
             file_path = os.path.join(path, file)
             with open(file_path, 'r', encoding='utf-8') as f:
                 stop_words.update(f.read().splitlines())
-        return stop_words
+        return frozenset(stop_words)
     except Exception as e:
         print(f"Warning: Error loading stopwords: {str(e)}. Using default stopwords.")
-        return set(STOPWORDS.splitlines())
+        return _DEFAULT_STOP
 
 def load_master_dictionary(path):
     try:
@@ -235,82 +271,134 @@ def load_master_dictionary(path):
         neg_path = os.path.join(path, 'negative-words.txt')
         
         with open(pos_path, 'r', encoding='utf-8') as f:
-            positive_words = set(f.read().splitlines())
+            positive_words = frozenset(f.read().splitlines())
         
         with open(neg_path, 'r', encoding='utf-8') as f:
-            negative_words = set(f.read().splitlines())
+            negative_words = frozenset(f.read().splitlines())
             
         return positive_words, negative_words
     except Exception as e:
         print(f"Warning: Error loading master dictionary: {str(e)}. Using default word lists.")
-        return set(POSITIVE_WORDS.splitlines()), set(NEGATIVE_WORDS.splitlines())
+        return _DEFAULT_POS, _DEFAULT_NEG
+
+def parse_article_html(html):
+    soup = BeautifulSoup(html, 'lxml')
+    h1 = soup.find('h1')
+    title = h1.get_text(strip=True) if h1 else ''
+    paragraphs = soup.find_all('p')
+    content = ' '.join(p.get_text(strip=True) for p in paragraphs)
+    return title + ' ' + content
 
-def extract_article_text(url):
+async def _fetch_article_text(client, limit, url):
     try:
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        title = soup.find('h1').get_text(strip=True) if soup.find('h1') else ''
-        paragraphs = soup.find_all('p')
-        content = ' '.join(p.get_text(strip=True) for p in paragraphs)
-        return title + ' ' + content
+        # Hold a slot only for the download, so timeouts never include waiting for a pooled connection
+        async with limit:
+            response = await client.get(url)
+        # Parsing is CPU work; run it off the event loop so it doesn't stall other downloads
+        return await asyncio.to_thread(parse_article_html, response.content)
     except Exception as e:
         print(f"Warning: Error extracting text from URL: {str(e)}")
         return ''
 
-def syllable_count(word):
-    word = word.lower()
-    count = len(re.findall(r'[aeiouy]', word))
+async def _fetch_all(urls):
+    limit = asyncio.Semaphore(FETCH_CONNECTIONS)
+    limits = httpx.Limits(max_connections=FETCH_CONNECTIONS)
+    async with httpx.AsyncClient(http2=HTTP2, follow_redirects=True, timeout=FETCH_TIMEOUT, limits=limits) as client:
+        return await asyncio.gather(*(_fetch_article_text(client, limit, url) for url in urls))
+
+def fetch_articles(urls):
+    """Fetch and extract article text for many URLs concurrently over shared pooled connections"""
+    # Each distinct URL is downloaded once, even if it appears on several rows
+    unique_urls = list(dict.fromkeys(urls))
+    fetched = dict(zip(unique_urls, asyncio.run(_fetch_all(unique_urls))))
+    return [fetched[url] for url in urls]
+
+@functools.lru_cache(maxsize=100_000)
+def _syllables(word):
+    """Syllable count for an already-lowercased word, memoized per word"""
+    count = len(_VOWEL_RE.findall(word))
     if word.endswith(('es', 'ed')):
         count -= 1
     return max(1, count)
 
-def avg_syllable_per_word(words):
-    if not words:
-        return 0
-    return sum(syllable_count(word) for word in words) / len(words)
+def token_totals(counts):
+    """Frequency-weighted word, character, syllable and complex-word totals over distinct tokens"""
+    n = len(counts)
+    freqs = np.fromiter(counts.values(), dtype=np.int64, count=n)
+    lengths = np.fromiter(map(len, counts), dtype=np.int64, count=n)
+    syllables = np.fromiter(map(_syllables, counts), dtype=np.int64, count=n)
+    return (
+        int(freqs.sum()),
+        int(lengths @ freqs),
+        int(syllables @ freqs),
+        int(freqs[syllables > 2].sum()),
+    )
+
+def _text_key(text):
+    """Short digest of an article's text, used as a cache key instead of the text itself"""
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+def _remember(cache, key, value):
+    """Store a result in a bounded cache, evicting the oldest entry once it is full"""
+    if len(cache) >= SCORE_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    cache[key] = value
 
 def calculate_scores(text):
-    try:
-        words = simple_word_tokenize(text)
-        cleaned_words = [word for word in words if word.isalnum() and word not in stop_words]
-        sentences = simple_sentence_tokenize(text)
+    global _score_lexicons
+    lexicons = (stop_words, positive_words, negative_words)
+    if any(current is not cached for current, cached in zip(lexicons, _score_lexicons)):
+        # The word lists were reassigned (e.g. reloaded by main), so cached scores are stale
+        _score_cache.clear()
+        _score_lexicons = lexicons
 
-        if not cleaned_words or not sentences:
+    key = _text_key(text)
+    if key not in _score_cache:
+        try:
+            _remember(_score_cache, key, _compute_scores(text))
+        except Exception as e:
+            print(f"Warning: Error calculating scores: {str(e)}")
             return [0] * 13
+    return list(_score_cache[key])
 
-        positive_score = sum(1 for word in cleaned_words if word in positive_words)
-        negative_score = sum(1 for word in cleaned_words if word in negative_words)
-        polarity_score = (positive_score - negative_score) / ((positive_score + negative_score) + 0.000001)
-        subjectivity_score = (positive_score + negative_score) / (len(cleaned_words) + 0.000001)
-
-        avg_sentence_length = len(cleaned_words) / len(sentences)
-        complex_words = [word for word in cleaned_words if syllable_count(word) > 2]
-        percentage_complex_words = len(complex_words) / len(cleaned_words)
-        fog_index = 0.4 * (avg_sentence_length + percentage_complex_words)
-
-        word_count = len(cleaned_words)
-        personal_pronouns = len(re.findall(r'\b(I|we|my|ours|us)\b', text, re.I))
-        avg_word_length = sum(len(word) for word in cleaned_words) / len(cleaned_words)
-
-        return [
-            positive_score,
-            negative_score,
-            polarity_score,
-            subjectivity_score,
-            avg_sentence_length,
-            percentage_complex_words,
-            fog_index,
-            avg_sentence_length,
-            len(complex_words),
-            word_count,
-            avg_syllable_per_word(cleaned_words),
-            personal_pronouns,
-            avg_word_length
-        ]
-    except Exception as e:
-        print(f"Warning: Error calculating scores: {str(e)}")
+def _compute_scores(text):
+    tokens, sentence_count = scan_text(text)
+    counts = {word: c for word, c in tokens.items() if word not in stop_words}
+
+    if not counts or not sentence_count:
         return [0] * 13
 
+    word_count, total_chars, total_syllables, complex_words_count = token_totals(counts)
+
+    # Lexicon hits via C-level set intersection over the distinct tokens
+    positive_score = sum(counts[word] for word in counts.keys() & positive_words)
+    negative_score = sum(counts[word] for word in counts.keys() & negative_words)
+    polarity_score = (positive_score - negative_score) / ((positive_score + negative_score) + 0.000001)
+    subjectivity_score = (positive_score + negative_score) / (word_count + 0.000001)
+
+    avg_sentence_length = word_count / sentence_count
+    percentage_complex_words = complex_words_count / word_count
+    fog_index = 0.4 * (avg_sentence_length + percentage_complex_words)
+
+    personal_pronouns = sum(tokens[word] for word in _PRONOUNS)
+    avg_word_length = total_chars / word_count
+
+    return [
+        positive_score,
+        negative_score,
+        polarity_score,
+        subjectivity_score,
+        avg_sentence_length,
+        percentage_complex_words,
+        fog_index,
+        avg_sentence_length,
+        complex_words_count,
+        word_count,
+        total_syllables / word_count,
+        personal_pronouns,
+        avg_word_length
+    ]
+
 def main():
     try:
         # Create word lists if they don't exist
@@ -333,32 +421,32 @@ def main():
             print(f"Error reading Excel file: {str(e)}")
             return
             
+        url_ids = df['URL_ID'].tolist()
+        urls = df['URL'].tolist()
+
+        # Fetch each distinct article concurrently; the work is bound by network latency
+        texts = fetch_articles(urls)
+
         results = []
-        for index, row in df.iterrows():
+        for index, (url_id, url, article_text) in enumerate(zip(url_ids, urls, texts)):
             try:
-                url = row['URL']
-                article_text = extract_article_text(url)
                 if not article_text:
-                    results.append([row['URL_ID'], url] + [None] * 13)
+                    results.append([url_id, url] + [None] * 13)
                     continue
                     
                 scores = calculate_scores(article_text)
-                results.append([row['URL_ID'], url] + scores)
+                results.append([url_id, url] + scores)
                 print(f"Processed URL {index + 1}/{len(df)}: {url}")
             except Exception as e:
                 print(f"Error processing URL {url}: {str(e)}")
-                results.append([row['URL_ID'], url] + [None] * 13)
+                results.append([url_id, url] + [None] * 13)
                 
         # Write results back to Excel
         try:
-            wb = load_workbook(output_path)
-            sheet = wb.active
-            
-            for i, result in enumerate(results, start=2):
-                for j, value in enumerate(result, start=1):
-                    sheet.cell(row=i, column=j, value=value)
-                    
-            wb.save(output_path)
+            # Overlay all rows below the existing header in a single bulk write
+            out_df = pd.DataFrame(results)
+            with pd.ExcelWriter(output_path, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
+                out_df.to_excel(writer, sheet_name=writer.book.active.title, startrow=1, header=False, index=False)
             print("Analysis completed successfully!")
         except Exception as e:
             print(f"Error writing results to Excel: {str(e)}")
@@ -1,127 +1,270 @@
+import asyncio
+import functools
+import hashlib
+import importlib.util
 import os
 import re
+from collections import Counter
+import numpy as np
 import pandas as pd
-import requests
+import httpx
 import torch
 from bs4 import BeautifulSoup
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from openpyxl import load_workbook
-from typing import List, Tuple
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, PreTrainedModel, PreTrainedTokenizerBase
+from typing import Dict, List, Optional, Tuple
 
 # Define paths using os.path.join for cross-platform compatibility
 base_path = r"path"
 input_path = os.path.join(base_path, "Output Data Structure.xlsx")
 output_path = input_path
 
-# Initialize BERT model and tokenizer
-tokenizer = AutoTokenizer.from_pretrained('nlptown/bert-base-multilingual-uncased-sentiment')
-model = AutoModelForSequenceClassification.from_pretrained('nlptown/bert-base-multilingual-uncased-sentiment')
+# HTTP fetch settings; concurrent fetches share one pooled client
+FETCH_CONNECTIONS = 64
+FETCH_TIMEOUT = 20
+# httpx needs the optional h2 package for HTTP/2; fall back to HTTP/1.1 without it
+HTTP2 = importlib.util.find_spec('h2') is not None
 
-def simple_word_tokenize(text: str) -> List[str]:
-    """Simple word tokenizer that splits on whitespace and punctuation"""
-    return re.findall(r'\b\w+\b', text.lower())
+# BERT model settings (half precision on GPU, bf16 only where natively supported; FP32 on CPU)
+MODEL_NAME = 'nlptown/bert-base-multilingual-uncased-sentiment'
+device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+if device.type == 'cuda':
+    dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+else:
+    dtype = torch.float32
 
-def simple_sentence_tokenize(text: str) -> List[str]:
-    """Simple sentence tokenizer that splits on common sentence endings"""
-    sentences = re.split(r'[.!?]+\s+(?=[A-Z])', text)
-    return [s.strip() for s in sentences if s.strip()]
+# Precompiled patterns shared by the tokenizers and scoring helpers
+_WORD_RE = re.compile(r'[^\W_]+')
+_SENT_RE = re.compile(r'[.!?]+\s+(?=[A-Z])')
+_VOWEL_RE = re.compile(r'[aeiouy]')
+_PRONOUNS = ('i', 'we', 'my', 'ours', 'us')
 
-def extract_article_text(url: str) -> str:
-    """Extract article text from URL using BeautifulSoup"""
+# Sentiment-independent metrics by text digest, so repeated articles are analyzed once;
+# only successful results are cached, and the oldest entries are evicted beyond SCORE_CACHE_SIZE
+SCORE_CACHE_SIZE = 4096
+_metrics_cache = {}
+
+# Sentiment for a text the model failed on; its sentiment columns are written as blanks
+_NO_SENTIMENT = (None, None, None)
+
+@functools.cache
+def _get_model() -> Tuple[PreTrainedTokenizerBase, PreTrainedModel]:
+    """Load the BERT tokenizer and model once per process, on first use"""
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME).to(device, dtype=dtype).eval()
+    return tokenizer, model
+
+def scan_text(text: str) -> Tuple[Counter, int]:
+    """
+    Tokenize words and count sentences without building the sentence strings
+    Returns: (Counter of lowercased words, number of sentences)
+    """
+    # Lowercase before matching: case folding can expand characters (e.g. 'İ'), which changes token splits
+    counts = Counter(_WORD_RE.findall(text.lower()))
+    # Every boundary starts a non-empty sentence; only the text before the first one can be blank
+    boundaries = 0
+    first_start = len(text)
+    for match in _SENT_RE.finditer(text):
+        if not boundaries:
+            first_start = match.start()
+        boundaries += 1
+    return counts, boundaries + (1 if text[:first_start].strip() else 0)
+
+def parse_article_html(html: bytes) -> str:
+    """Extract the title and paragraph text from an HTML page"""
+    soup = BeautifulSoup(html, 'lxml')
+    h1 = soup.find('h1')
+    title = h1.get_text(strip=True) if h1 else ''
+    paragraphs = soup.find_all('p')
+    content = ' '.join(p.get_text(strip=True) for p in paragraphs)
+    return title + ' ' + content
+
+async def _fetch_article_text(client: httpx.AsyncClient, limit: asyncio.Semaphore, url: str) -> str:
+    """Download one article and extract its text, returning an empty string on failure"""
     try:
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        title = soup.find('h1').get_text(strip=True) if soup.find('h1') else ''
-        paragraphs = soup.find_all('p')
-        content = ' '.join(p.get_text(strip=True) for p in paragraphs)
-        return title + ' ' + content
+        # Hold a slot only for the download, so timeouts never include waiting for a pooled connection
+        async with limit:
+            response = await client.get(url)
+        # Parsing is CPU work; run it off the event loop so it doesn't stall other downloads
+        return await asyncio.to_thread(parse_article_html, response.content)
     except Exception as e:
         print(f"Warning: Error extracting text from URL: {str(e)}")
         return ''
 
-def get_bert_sentiment(text: str) -> Tuple[float, float, float]:
+async def _fetch_all(urls: List[str]) -> List[str]:
+    """Fetch all URLs concurrently, returning texts in input order"""
+    limit = asyncio.Semaphore(FETCH_CONNECTIONS)
+    limits = httpx.Limits(max_connections=FETCH_CONNECTIONS)
+    async with httpx.AsyncClient(http2=HTTP2, follow_redirects=True, timeout=FETCH_TIMEOUT, limits=limits) as client:
+        return await asyncio.gather(*(_fetch_article_text(client, limit, url) for url in urls))
+
+def fetch_articles(urls: List[str]) -> List[str]:
+    """Fetch and extract article text for many URLs concurrently over shared pooled connections"""
+    # Each distinct URL is downloaded once, even if it appears on several rows
+    unique_urls = list(dict.fromkeys(urls))
+    fetched = dict(zip(unique_urls, asyncio.run(_fetch_all(unique_urls))))
+    return [fetched[url] for url in urls]
+
+def _score_sentiment(tokenizer: PreTrainedTokenizerBase, model: PreTrainedModel, texts: List[str]) -> List[Tuple[float, float, float]]:
+    """Run BERT on one padded batch of texts; raises on failure"""
+    # Truncate each text to BERT's maximum length and pad to the longest in the batch
+    encoded = tokenizer(texts, truncation=True, padding=True, max_length=512, return_tensors='pt').to(device)
+
+    with torch.inference_mode():
+        output = model(**encoded)
+        scores = torch.nn.functional.softmax(output.logits.float(), dim=1)
+
+    # BERT model returns scores from 1 to 5 stars
+    # Convert to positive/negative/compound scores
+    positive = scores[:, 3:].sum(dim=1)  # 4 and 5 stars
+    negative = scores[:, :2].sum(dim=1)  # 1 and 2 stars
+    neutral = scores[:, 2]               # 3 stars
+
+    # Calculate compound score (-1 to 1 range)
+    compound = (positive - negative) / (positive + negative + neutral)
+
+    return list(zip(positive.tolist(), negative.tolist(), compound.tolist()))
+
+def get_bert_sentiment_batch(texts: List[str], batch_size: int = 32) -> List[Tuple[Optional[float], Optional[float], Optional[float]]]:
+    """
+    Calculate BERT sentiment scores for many texts, running the model on padded mini-batches
+    Returns: one (positive_score, negative_score, compound_score) tuple per text, all None if it could not be scored
+    """
+    # Load outside the per-batch handling: a model that can't load should stop the run, not blank every row
+    tokenizer, model = _get_model()
+    results = []
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        try:
+            results.extend(_score_sentiment(tokenizer, model, batch))
+            continue
+        except Exception as e:
+            print(f"Warning: Error in BERT sentiment analysis: {str(e)}")
+            if len(batch) == 1:
+                results.append(_NO_SENTIMENT)
+                continue
+
+        # Retry a failed batch one text at a time so a single bad input doesn't sink the rest
+        for text in batch:
+            try:
+                results.extend(_score_sentiment(tokenizer, model, [text]))
+            except Exception as e:
+                print(f"Warning: Error in BERT sentiment analysis: {str(e)}")
+                results.append(_NO_SENTIMENT)
+    return results
+
+def get_bert_sentiment(text: str) -> Tuple[Optional[float], Optional[float], Optional[float]]:
     """
     Calculate sentiment scores using BERT
-    Returns: (positive_score, negative_score, compound_score)
+    Returns: (positive_score, negative_score, compound_score), all None on failure
     """
-    try:
-        # Truncate text to BERT's maximum length
-        encoded = tokenizer(text, truncation=True, padding=True, return_tensors='pt')
-        
-        with torch.no_grad():
-            output = model(**encoded)
-            scores = torch.nn.functional.softmax(output.logits, dim=1)
-            
-        # BERT model returns scores from 1 to 5 stars
-        # Convert to positive/negative/compound scores
-        positive_score = float(scores[0][3:].sum())  # 4 and 5 stars
-        negative_score = float(scores[0][:2].sum())  # 1 and 2 stars
-        neutral_score = float(scores[0][2])          # 3 stars
-        
-        # Calculate compound score (-1 to 1 range)
-        compound_score = (positive_score - negative_score) / (positive_score + negative_score + neutral_score)
-        
-        return positive_score, negative_score, compound_score
-        
-    except Exception as e:
-        print(f"Warning: Error in BERT sentiment analysis: {str(e)}")
-        return 0.0, 0.0, 0.0
+    return get_bert_sentiment_batch([text])[0]
 
-def syllable_count(word: str) -> int:
-    """Count syllables in a word"""
-    word = word.lower()
-    count = len(re.findall(r'[aeiouy]', word))
+@functools.lru_cache(maxsize=100_000)
+def _syllables(word: str) -> int:
+    """Count syllables in an already-lowercased word (memoized)"""
+    count = len(_VOWEL_RE.findall(word))
     if word.endswith(('es', 'ed')):
         count -= 1
     return max(1, count)
 
-def calculate_scores(text: str) -> List[float]:
-    """Calculate all text metrics including BERT sentiment"""
-    try:
-        words = simple_word_tokenize(text)
-        cleaned_words = [word for word in words if word.isalnum()]
-        sentences = simple_sentence_tokenize(text)
+def token_totals(counts: Dict[str, int]) -> Tuple[int, int, int, int]:
+    """
+    Frequency-weighted totals over distinct tokens, reduced with NumPy
+    Returns: (word_count, total_chars, total_syllables, complex_words_count)
+    """
+    n = len(counts)
+    freqs = np.fromiter(counts.values(), dtype=np.int64, count=n)
+    lengths = np.fromiter(map(len, counts), dtype=np.int64, count=n)
+    syllables = np.fromiter(map(_syllables, counts), dtype=np.int64, count=n)
+    return (
+        int(freqs.sum()),
+        int(lengths @ freqs),
+        int(syllables @ freqs),
+        int(freqs[syllables > 2].sum()),
+    )
 
-        if not cleaned_words or not sentences:
-            return [0] * 13
+def _text_key(text: str) -> bytes:
+    """Short digest of an article's text, used as a cache key instead of the text itself"""
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
 
-        # Get BERT sentiment scores
-        positive_score, negative_score, polarity_score = get_bert_sentiment(text)
-        
-        # Calculate subjectivity (ratio of opinionated content)
-        subjectivity_score = abs(polarity_score)
-
-        # Calculate readability metrics
-        avg_sentence_length = len(cleaned_words) / len(sentences)
-        complex_words = [word for word in cleaned_words if syllable_count(word) > 2]
-        percentage_complex_words = len(complex_words) / len(cleaned_words)
-        fog_index = 0.4 * (avg_sentence_length + percentage_complex_words)
-
-        # Calculate other text metrics
-        word_count = len(cleaned_words)
-        personal_pronouns = len(re.findall(r'\b(I|we|my|ours|us)\b', text, re.I))
-        avg_word_length = sum(len(word) for word in cleaned_words) / len(cleaned_words)
-        avg_syllables = sum(syllable_count(word) for word in cleaned_words) / len(cleaned_words)
-
-        return [
-            positive_score,
-            negative_score,
-            polarity_score,
-            subjectivity_score,
-            avg_sentence_length,
-            percentage_complex_words,
-            fog_index,
-            avg_sentence_length,
-            len(complex_words),
-            word_count,
-            avg_syllables,
-            personal_pronouns,
-            avg_word_length
-        ]
+def calculate_scores(text: str, sentiment: Optional[Tuple[Optional[float], Optional[float], Optional[float]]] = None) -> List[Optional[float]]:
+    """
+    Calculate all text metrics including BERT sentiment (pass a precomputed sentiment to skip the model)
+    The sentiment columns are None if the model failed on this text
+    """
+    try:
+        metrics = _cached_text_metrics(text)
     except Exception as e:
         print(f"Warning: Error calculating scores: {str(e)}")
         return [0] * 13
 
+    if metrics is None:
+        return [0] * 13
+
+    # Get BERT sentiment scores
+    if sentiment is None:
+        sentiment = get_bert_sentiment(text)
+    positive_score, negative_score, polarity_score = sentiment
+
+    # Calculate subjectivity (ratio of opinionated content)
+    subjectivity_score = abs(polarity_score) if polarity_score is not None else None
+
+    return [positive_score, negative_score, polarity_score, subjectivity_score] + metrics
+
+def _remember(cache: Dict[bytes, Optional[List[float]]], key: bytes, value: Optional[List[float]]) -> None:
+    """Store a result in a bounded cache, evicting the oldest entry once it is full"""
+    if len(cache) >= SCORE_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+def _cached_text_metrics(text: str) -> Optional[List[float]]:
+    """_text_metrics memoized by text digest; errors propagate and are not cached"""
+    key = _text_key(text)
+    if key not in _metrics_cache:
+        _remember(_metrics_cache, key, _text_metrics(text))
+    return _metrics_cache[key]
+
+def _has_text_metrics(text: str) -> bool:
+    """Whether calculate_scores will need a sentiment for this text (it has words and sentences)"""
+    try:
+        return _cached_text_metrics(text) is not None
+    except Exception:
+        return False
+
+def _text_metrics(text: str) -> Optional[List[float]]:
+    """
+    Calculate the sentiment-independent text metrics, in calculate_scores column order
+    Returns None if the text has no words or sentences
+    """
+    tokens, sentence_count = scan_text(text)
+
+    if not tokens or not sentence_count:
+        return None
+
+    word_count, total_chars, total_syllables, complex_words_count = token_totals(tokens)
+
+    # Calculate readability metrics
+    avg_sentence_length = word_count / sentence_count
+    percentage_complex_words = complex_words_count / word_count
+    fog_index = 0.4 * (avg_sentence_length + percentage_complex_words)
+
+    # Calculate other text metrics
+    personal_pronouns = sum(tokens[word] for word in _PRONOUNS)
+    avg_word_length = total_chars / word_count
+    avg_syllables = total_syllables / word_count
+
+    return [
+        avg_sentence_length,
+        percentage_complex_words,
+        fog_index,
+        avg_sentence_length,
+        complex_words_count,
+        word_count,
+        avg_syllables,
+        personal_pronouns,
+        avg_word_length
+    ]
+
 def main():
     try:
         # Check if input file exists
@@ -136,32 +279,44 @@ def main():
             print(f"Error reading Excel file: {str(e)}")
             return
             
+        url_ids = df['URL_ID'].tolist()
+        urls = df['URL'].tolist()
+
+        # Fetch each distinct article concurrently first so BERT can score them in batches
+        texts = fetch_articles(urls)
+
+        # Score each distinct article text once, keyed by its digest rather than the full body.
+        # Texts without words or sentences score zeros without the model, so they are not batched.
+        text_keys = {}
+        to_score = {}
+        for url, text in zip(urls, texts):
+            if not text or url in text_keys:
+                continue
+            key = text_keys[url] = _text_key(text)
+            if key not in to_score and _has_text_metrics(text):
+                to_score[key] = text
+        sentiments = dict(zip(to_score, get_bert_sentiment_batch(list(to_score.values()))))
+
         results = []
-        for index, row in df.iterrows():
+        for index, (url_id, url, article_text) in enumerate(zip(url_ids, urls, texts)):
             try:
-                url = row['URL']
-                article_text = extract_article_text(url)
                 if not article_text:
-                    results.append([row['URL_ID'], url] + [None] * 13)
+                    results.append([url_id, url] + [None] * 13)
                     continue
                     
-                scores = calculate_scores(article_text)
-                results.append([row['URL_ID'], url] + scores)
+                scores = calculate_scores(article_text, sentiments.get(text_keys[url], _NO_SENTIMENT))
+                results.append([url_id, url] + scores)
                 print(f"Processed URL {index + 1}/{len(df)}: {url}")
             except Exception as e:
                 print(f"Error processing URL {url}: {str(e)}")
-                results.append([row['URL_ID'], url] + [None] * 13)
+                results.append([url_id, url] + [None] * 13)
                 
         # Write results back to Excel
         try:
-            wb = load_workbook(output_path)
-            sheet = wb.active
-            
-            for i, result in enumerate(results, start=2):
-                for j, value in enumerate(result, start=1):
-                    sheet.cell(row=i, column=j, value=value)
-                    
-            wb.save(output_path)
+            # Overlay all rows below the existing header in a single bulk write
+            out_df = pd.DataFrame(results)
+            with pd.ExcelWriter(output_path, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
+                out_df.to_excel(writer, sheet_name=writer.book.active.title, startrow=1, header=False, index=False)
             print("Analysis completed successfully!")
         except Exception as e:
             print(f"Error writing results to Excel: {str(e)}")